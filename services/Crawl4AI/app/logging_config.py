@@ -0,0 +1,40 @@
+"""
+Logging configuration for the Web Scraping Service.
+Log records are handed to a queue and written to stderr by a background
+listener thread, so request handlers never block on stream I/O.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+@contextmanager
+def queue_logging(level: Optional[str] = None) -> Iterator[logging.handlers.QueueListener]:
+    """
+    Route root logging through a queue drained by a stderr listener thread.
+
+    Args:
+        level: Root log level, defaults to the LOG_LEVEL environment variable or INFO
+
+    Yields:
+        The running QueueListener
+    """
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+    listener.start()
+    try:
+        yield listener
+    finally:
+        listener.stop()
+        root.removeHandler(queue_handler)
@@ -2,9 +2,15 @@
 FastAPI application for the Web Scraping Service using Crawl4AI.
 This service provides endpoints for extracting content from URLs using various strategies.
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import HttpUrl
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from typing import Optional, Any
 
 # Import models
@@ -12,122 +18,229 @@ from app.models import (
     ExtractionOptions,
     ExtractionResponse,
     BrowserConfig,
-    ErrorResponse
+    ErrorResponse,
+    URL_PATTERN
 )
 
 # Import services
-from app.services.crawler import extract_content, check_robots_txt
+from app.services.crawler import (
+    extract_content,
+    check_robots_txt,
+    shutdown_crawlers,
+    shutdown_http_client,
+    shutdown_playwright
+)
+
+# Import middleware
+from app.middleware import CORSPureASGI, SelectiveGZip
+from app.responses import ORJSONResponse
+from app.logging_config import queue_logging
+
+logger = logging.getLogger(__name__)
+
+# ExtractionOptions fields forwarded to extract_content as its options dict
+_OPTION_KEYS = (
+    "headless", "verbose", "user_agent", "use_browser", "block_resources",
+    "filter_type", "threshold", "query",
+    "use_cache", "js_scripts", "wait_selectors", "wait_until", "global_timeout",
+    "strip_anchor_noise", "include_raw_markdown", "static_fast_path",
+    "check_robots_txt", "respect_rate_limits",
+    "extraction_schema"
+)
+
+# /extract validates its raw body in one pass, so its request schema is
+# published by hand in the OpenAPI document
+_REQ_ADAPTER = TypeAdapter(ExtractionOptions)
+_REQ_SCHEMA = _REQ_ADAPTER.json_schema(ref_template="#/components/schemas/{model}")
+_REQ_SCHEMA_DEFS = _REQ_SCHEMA.pop("$defs", {})
+
+# Placeholder for results without content; shared, so it must never be mutated
+_EMPTY_CONTENT = {'html': '', 'markdown': '', 'raw_markdown': ''}
+
+# Results whose HTML exceeds this size are streamed to clients that accept NDJSON
+STREAM_THRESHOLD = 256 * 1024
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Static service information served by the root endpoint, encoded once
+_ROOT_BYTES = orjson.dumps({
+    "service": "Web Scraping Service",
+    "version": "0.1.0",
+    "status": "operational"
+})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the shared HTTP pool, crawlers and Playwright browser on shutdown, logging through a queue meanwhile."""
+    with queue_logging():
+        try:
+            yield
+        finally:
+            await shutdown_http_client()
+            await shutdown_crawlers()
+            await shutdown_playwright()
+
+async def _ndjson_stream(result: dict):
+    """Yield an extraction result as NDJSON frames: metadata, content, then extracted data."""
+    for key in ("metadata", "content", "extracted_data"):
+        yield orjson.dumps({key: result.get(key)}) + b"\n"
+
+def _discard_outcome(task: asyncio.Task) -> None:
+    """Retrieve a finished task's exception so asyncio doesn't report it as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+def _cancel_extraction(task: asyncio.Task) -> None:
+    """Cancel an extraction whose result won't be used, consuming any error it ends with."""
+    task.cancel()
+    task.add_done_callback(_discard_outcome)
 
 # Create FastAPI app
 app = FastAPI(
     title="Web Scraping Service",
     description="API for extracting content from URLs using Crawl4AI",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+def openapi() -> dict:
+    """Generate the OpenAPI schema, adding the request models /extract validates itself."""
+    if app.openapi_schema is None:
+        schema = FastAPI.openapi(app)
+        schemas = schema.setdefault("components", {}).setdefault("schemas", {})
+        schemas.update(_REQ_SCHEMA_DEFS)
+        schemas["ExtractionOptions"] = _REQ_SCHEMA
+    return app.openapi_schema
+
+app.openapi = openapi
+
+# Compress responses; extraction results are large, highly compressible text
+app.add_middleware(
+    SelectiveGZip,
+    minimum_size=1024,
+    compresslevel=5,
+    stream_media_types=[NDJSON_MEDIA_TYPE],
 )
 
 # Add CORS middleware - only allow local requests
 app.add_middleware(
-    CORSMiddleware,
+    CORSPureASGI,
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
 )
 
 @app.get("/")
+@app.head("/", include_in_schema=False)
 async def root():
     """Root endpoint that returns service information."""
-    return {
-        "service": "Web Scraping Service",
-        "version": "0.1.0",
-        "status": "operational"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
-@app.post("/extract", response_model=ExtractionResponse)
-async def api_extract_content(request_data: ExtractionOptions):
+@app.post(
+    "/extract",
+    responses={200: {"model": ExtractionResponse, "content": {NDJSON_MEDIA_TYPE: {}}}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ExtractionOptions"}}}
+        }
+    }
+)
+async def api_extract_content(request: Request):
     """
     Extract content from a URL using Crawl4AI.
     
     This endpoint accepts configuration options for the extraction process
-    and returns the extracted content in various formats.
+    and returns the extracted content in various formats. Clients sending
+    `Accept: application/x-ndjson` receive large results as a stream of
+    metadata, content and extracted_data lines instead.
     """
+    # Parse and validate the JSON body in a single pydantic-core pass
+    try:
+        request_data = _REQ_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+    
     try:
-        # Convert URL to string to avoid HttpUrl object issues
-        url_str = str(request_data.url)
+        url_str = request_data.url
+        
+        # Log request data for debugging
+        logger.debug("Request data: %s", request_data)
+        logger.debug("URL: %s", url_str)
+        logger.debug("Selectors: %s", request_data.selectors)
+        
+        # Project the fields the client actually sent onto a plain options
+        # dict; extract_content applies its own defaults for the rest and
+        # only the nested extraction schema needs a real dump
+        fields_set = request_data.model_fields_set
+        options = {key: getattr(request_data, key) for key in _OPTION_KEYS if key in fields_set}
+        # The crawler's threshold default depends on the filter, so always
+        # forward the model's documented default as well
+        options['threshold'] = request_data.threshold
+        if request_data.extraction_schema is not None:
+            options['extraction_schema'] = request_data.extraction_schema.model_dump()
+        # robots.txt is enforced below, concurrently with the extraction
+        options['check_robots_txt'] = False
+        
+        # Base selectors are extracted with the browser, so force it on
+        sel = request_data.selectors
+        selectors = None
+        if sel is not None:
+            selectors = {key: value for key, value in sel.items() if value is not None}
+            if selectors.get('base_selector'):
+                options['use_browser'] = True
         
-        # Print request data for debugging
-        print(f"Request data: {request_data}")
-        print(f"URL: {url_str}")
-        print(f"Selectors: {request_data.selectors}")
+        # Start extracting right away so browser startup and page load overlap
+        # with the robots.txt check; the result is only used once it passes
+        extract_task = asyncio.create_task(extract_content(url_str, selectors, options))
         
         # Check robots.txt compliance if enabled
+        # check_robots_txt never raises; it reports fetch errors as allowed
         if request_data.check_robots_txt:
             try:
-                robots_result = await check_robots_txt(
-                    url_str,  # Use string URL instead of HttpUrl object
-                    request_data.user_agent or "webinsight"
+                robots_result = await check_robots_txt(url_str, request_data.user_agent or "webinsight")
+            except BaseException:
+                _cancel_extraction(extract_task)
+                raise
+            
+            if not robots_result["allowed"]:
+                _cancel_extraction(extract_task)
+                raise HTTPException(
+                    status_code=403, 
+                    detail=f"Scraping not allowed by robots.txt for {url_str}"
                 )
-                
-                if not robots_result["allowed"]:
-                    raise HTTPException(
-                        status_code=403, 
-                        detail=f"Scraping not allowed by robots.txt for {url_str}"
-                    )
-            except Exception as robots_error:
-                print(f"Error checking robots.txt: {str(robots_error)}")
-                # Continue even if robots check fails
         
-        # Extract content with string URL instead of HttpUrl object
-        try:
-            # Create a copy of the options to avoid modifying the original
-            options = request_data.model_dump(exclude={"url", "selectors"})
-            
-            # Force use_browser=True for specific selector tests
-            if request_data.selectors and 'base_selector' in request_data.selectors:
-                options['use_browser'] = True
-                print(f"Forcing use_browser=True for base_selector: {request_data.selectors['base_selector']}")
-            
-            result = await extract_content(
-                url_str,  # Use string URL to avoid 'decode' attribute errors
-                request_data.selectors,
-                options
-            )
+        result = await extract_task
+        
+        # Validate result before returning
+        if not result:
+            raise ValueError("No result returned from extract_content")
             
-            # Validate result before returning
-            if not result:
-                raise ValueError("No result returned from extract_content")
-                
-            # Ensure content exists
-            if 'content' not in result:
-                result['content'] = {'html': '', 'markdown': '', 'raw_markdown': ''}
-                
-            # Ensure extracted_data exists
-            if 'extracted_data' not in result:
-                result['extracted_data'] = None
-                
-            return result
-        except Exception as extract_error:
-            import traceback
-            print(f"Error in extract_content: {str(extract_error)}")
-            print(f"Error type: {type(extract_error).__name__}")
-            print(f"Traceback: {traceback.format_exc()}")
-            raise HTTPException(status_code=500, detail=str(extract_error))
+        # Ensure content and extracted_data exist, on a copy since the result
+        # may be the one held by the crawler's result cache
+        if 'content' not in result or 'extracted_data' not in result:
+            result = {'content': _EMPTY_CONTENT, 'extracted_data': None, **result}
+        
+        # Stream large pages to clients that opted in, so the first bytes go
+        # out before the whole document is serialized
+        if (len(result['content'].get('html') or '') > STREAM_THRESHOLD
+                and NDJSON_MEDIA_TYPE in request.headers.get('accept', '')):
+            return StreamingResponse(_ndjson_stream(result), media_type=NDJSON_MEDIA_TYPE)
+        
+        # Serialize directly; the result is already shaped like ExtractionResponse
+        return ORJSONResponse(result)
+    except HTTPException:
+        raise
     except Exception as e:
-        import traceback
-        print(f"Unhandled error in api_extract_content: {str(e)}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error extracting content")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/robots-check")
-async def check_robots(url: HttpUrl, user_agent: Optional[str] = "webinsight"):
+async def check_robots(url: str = Query(..., pattern=URL_PATTERN), user_agent: Optional[str] = "webinsight"):
     """Check if scraping is allowed by robots.txt for a given URL."""
     try:
-        result = await check_robots_txt(str(url), user_agent)
+        result = await check_robots_txt(url, user_agent)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,132 @@
+"""
+ASGI middleware for the Web Scraping Service.
+These middlewares operate directly on the ASGI scope/send callables so that no
+Request/Response objects are allocated on the hot path.
+"""
+from typing import Iterable, List, Tuple
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class CORSPureASGI:
+    """
+    Minimal CORS middleware for a fixed list of allowed origins.
+
+    Mirrors the behaviour of Starlette's CORSMiddleware configured with
+    allow_credentials=True, allow_methods=["*"] and allow_headers=["*"]:
+    preflight requests are answered directly and simple requests get the
+    CORS headers appended to the outgoing response start message.
+    """
+
+    # Headers shared by every CORS response, precomputed once
+    SIMPLE_HEADERS: Tuple[Tuple[bytes, bytes], ...] = (
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    )
+    PREFLIGHT_HEADERS: Tuple[Tuple[bytes, bytes], ...] = (
+        (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+        (b"access-control-max-age", b"600"),
+        (b"content-length", b"2"),
+        (b"content-type", b"text/plain; charset=utf-8"),
+    )
+
+    def __init__(self, app: ASGIApp, allow_origins: Iterable[str]):
+        """Wrap an ASGI app with CORS handling for the given origins."""
+        self.app = app
+        self.allowed = frozenset(origin.encode("latin-1") for origin in allow_origins)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Parse the headers we care about in a single pass over the raw list
+        origin = None
+        request_method = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        # Not a CORS request, nothing to do
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(origin, request_headers, send)
+            return
+
+        if origin not in self.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = ((b"access-control-allow-origin", origin),) + self.SIMPLE_HEADERS
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers: List[Tuple[bytes, bytes]] = list(message.get("headers", ()))
+                headers.extend(cors_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _preflight(self, origin: bytes, request_headers, send: Send) -> None:
+        """Answer a CORS preflight request without calling the wrapped app."""
+        if origin not in self.allowed:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(b"access-control-allow-origin", origin)]
+        headers.extend(self.SIMPLE_HEADERS)
+        headers.extend(self.PREFLIGHT_HEADERS)
+        if request_headers:
+            headers.append((b"access-control-allow-headers", request_headers))
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"OK"})
+
+
+class SelectiveGZip:
+    """
+    GZip compression that leaves streaming requests alone.
+
+    Requests whose Accept header names one of the streaming media types go
+    straight to the wrapped app, so compression never buffers a stream and
+    delays its first bytes. Everything else goes through GZipMiddleware.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 5,
+        stream_media_types: Iterable[str] = ("application/x-ndjson",),
+    ):
+        """Wrap an ASGI app with gzip compression."""
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.stream_media_types = tuple(media_type.encode("latin-1") for media_type in stream_media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"accept" and any(media_type in value for media_type in self.stream_media_types):
+                    await self.app(scope, receive, send)
+                    return
+        await self.gzip(scope, receive, send)
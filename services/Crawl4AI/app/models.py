@@ -2,8 +2,98 @@
 Pydantic models for the Web Scraping Service.
 These models define the structure of requests and responses for the API.
 """
-from pydantic import BaseModel, Field, HttpUrl
-from typing import Dict, List, Optional, Any, Union
+from pydantic import BaseModel, ConfigDict, Field, with_config
+from typing import Annotated, Dict, List, Literal, Optional, Any, Union
+from typing_extensions import TypedDict
+
+# Cheap structural check for http(s) URLs; full parsing happens only where a
+# host is actually needed (robots.txt checks)
+URL_PATTERN = r"^https?://[^\s]+$"
+
+def _model_config(**kwargs: Any) -> ConfigDict:
+    """Shared config: immutable models that ignore unknown fields."""
+    return ConfigDict(
+        frozen=True,
+        extra='ignore',
+        validate_assignment=False,
+        str_strip_whitespace=False,
+        **kwargs
+    )
+
+# OpenAPI examples, defined once at module level and shared by reference
+_SELECTOR_EXAMPLE = {
+    "base_selector": "article.content",
+    "include_selectors": ["h1.title", ".article-body", ".author-name"],
+    "exclude_selectors": [".advertisement", ".related-articles"]
+}
+
+_SCHEMA_EXAMPLE = {
+    "name": "Article Content",
+    "base_selector": "article.content",
+    "fields": [
+        {
+            "name": "title",
+            "selector": "h1.title",
+            "type": "text"
+        },
+        {
+            "name": "content",
+            "selector": ".article-body",
+            "type": "text"
+        },
+        {
+            "name": "author",
+            "selector": ".author-name",
+            "type": "text"
+        },
+        {
+            "name": "published_date",
+            "selector": "time.published",
+            "type": "attribute",
+            "attribute": "datetime"
+        }
+    ]
+}
+
+_OPTIONS_EXAMPLE = {
+    "url": "https://example.com/article/1",
+    "selectors": {
+        "base_selector": "article.content",
+        "include_selectors": ["h1.title", ".article-body"],
+        "exclude_selectors": [".advertisement"]
+    },
+    "headless": True,
+    "verbose": False,
+    "use_browser": True,
+    "filter_type": "pruning",
+    "threshold": 0.48,
+    "use_cache": True,
+    "check_robots_txt": True
+}
+
+_RESPONSE_EXAMPLE = {
+    "content": {
+        "markdown": "# Article Title\n\nArticle content goes here...",
+        "raw_markdown": "# Article Title\n\nArticle content goes here with additional elements...",
+        "html": "<h1>Article Title</h1><p>Article content goes here...</p>"
+    },
+    "extracted_data": {
+        "title": "Article Title",
+        "content": "Article content goes here...",
+        "author": "John Doe",
+        "published_date": "2023-10-15T14:30:00Z"
+    },
+    "metadata": {
+        "url": "https://example.com/article/1",
+        "extraction_time": "2023-10-16T08:45:12Z",
+        "content_length": 2345,
+        "extraction_strategy": "markdown"
+    }
+}
+
+_ERROR_EXAMPLE = {
+    "detail": "Failed to extract content: Connection timeout"
+}
 
 class BrowserConfig(BaseModel):
     """Configuration for the browser used by Crawl4AI."""
@@ -14,21 +104,17 @@ class BrowserConfig(BaseModel):
     viewport_height: Optional[int] = Field(None, description="Browser viewport height")
     timeout: Optional[int] = Field(None, description="Page load timeout in milliseconds")
     stealth_mode: bool = Field(False, description="Enable stealth mode to avoid detection")
+    
+    model_config = _model_config()
 
-class SelectorConfig(BaseModel):
+# A TypedDict rather than a model so pydantic-core validates it without
+# building an instance; handlers receive a plain dict
+@with_config(ConfigDict(extra='ignore', json_schema_extra={"example": _SELECTOR_EXAMPLE}))
+class SelectorConfig(TypedDict, total=False):
     """Configuration for CSS selectors used in extraction."""
-    base_selector: Optional[str] = Field(None, description="Base CSS selector for extraction")
-    include_selectors: Optional[List[str]] = Field(None, description="CSS selectors to include")
-    exclude_selectors: Optional[List[str]] = Field(None, description="CSS selectors to exclude")
-    
-    class Config:
-        schema_extra = {
-            "example": {
-                "base_selector": "article.content",
-                "include_selectors": ["h1.title", ".article-body", ".author-name"],
-                "exclude_selectors": [".advertisement", ".related-articles"]
-            }
-        }
+    base_selector: Annotated[Optional[str], Field(description="Base CSS selector for extraction")]
+    include_selectors: Annotated[Optional[List[str]], Field(description="CSS selectors to include")]
+    exclude_selectors: Annotated[Optional[List[str]], Field(description="CSS selectors to exclude")]
 
 class ExtractionSchema(BaseModel):
     """Schema for structured data extraction using CSS selectors."""
@@ -36,40 +122,11 @@ class ExtractionSchema(BaseModel):
     base_selector: str = Field(..., description="Base CSS selector for the schema")
     fields: List[Dict[str, Any]] = Field(..., description="Fields to extract")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "name": "Article Content",
-                "base_selector": "article.content",
-                "fields": [
-                    {
-                        "name": "title",
-                        "selector": "h1.title",
-                        "type": "text"
-                    },
-                    {
-                        "name": "content",
-                        "selector": ".article-body",
-                        "type": "text"
-                    },
-                    {
-                        "name": "author",
-                        "selector": ".author-name",
-                        "type": "text"
-                    },
-                    {
-                        "name": "published_date",
-                        "selector": "time.published",
-                        "type": "attribute",
-                        "attribute": "datetime"
-                    }
-                ]
-            }
-        }
+    model_config = _model_config(json_schema_extra={"example": _SCHEMA_EXAMPLE})
 
 class ExtractionOptions(BaseModel):
     """Options for content extraction using Crawl4AI, including browser-based extraction via Playwright."""
-    url: HttpUrl = Field(..., description="URL to extract content from")
+    url: str = Field(..., pattern=URL_PATTERN, description="URL to extract content from")
     selectors: Optional[SelectorConfig] = Field(None, description="CSS selectors for content extraction")
     extraction_schema: Optional[ExtractionSchema] = Field(None, description="Schema for structured data extraction")
     
@@ -78,6 +135,7 @@ class ExtractionOptions(BaseModel):
     verbose: bool = Field(False, description="Enable verbose logging")
     user_agent: Optional[str] = Field(None, description="Custom user agent string")
     use_browser: bool = Field(False, description="Use Playwright for dynamic content extraction (JS rendering)")
+    block_resources: bool = Field(True, description="Skip loading images, media, fonts and stylesheets during browser extraction")
     
     # Content filtering
     filter_type: Optional[str] = Field("pruning", description="Content filter type (pruning or bm25)")
@@ -88,29 +146,19 @@ class ExtractionOptions(BaseModel):
     use_cache: bool = Field(True, description="Enable caching of results")
     js_scripts: Optional[List[str]] = Field(None, description="Custom JavaScript to execute on page")
     wait_selectors: Optional[List[str]] = Field(None, description="CSS selectors to wait for before extraction")
+    wait_until: Literal["commit", "domcontentloaded", "load", "networkidle"] = Field(
+        "domcontentloaded", description="Page lifecycle event that ends navigation before extraction"
+    )
+    global_timeout: float = Field(30.0, gt=0, description="Overall deadline in seconds for browser-based extraction of a page")
+    strip_anchor_noise: bool = Field(False, description="Remove code line anchors and same-page anchor links from the markdown")
+    include_raw_markdown: bool = Field(True, description="Include the unfiltered markdown as content.raw_markdown")
+    static_fast_path: bool = Field(False, description="Fetch pages without scripts in their <head> over plain HTTP instead of navigating a browser")
     
     # Ethical scraping
     check_robots_txt: bool = Field(True, description="Check robots.txt before scraping")
     respect_rate_limits: bool = Field(True, description="Respect rate limits for domains")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "url": "https://example.com/article/1",
-                "selectors": {
-                    "base_selector": "article.content",
-                    "include_selectors": ["h1.title", ".article-body"],
-                    "exclude_selectors": [".advertisement"]
-                },
-                "headless": True,
-                "verbose": False,
-                "use_browser": True,
-                "filter_type": "pruning",
-                "threshold": 0.48,
-                "use_cache": True,
-                "check_robots_txt": True
-            }
-        }
+    model_config = _model_config(json_schema_extra={"example": _OPTIONS_EXAMPLE})
 
 class ExtractionResponse(BaseModel):
     """Response from content extraction."""
@@ -118,36 +166,10 @@ class ExtractionResponse(BaseModel):
     extracted_data: Optional[Any] = Field(None, description="Structured data extracted using schema")
     metadata: Dict[str, Any] = Field({}, description="Metadata about the extraction process")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "content": {
-                    "markdown": "# Article Title\n\nArticle content goes here...",
-                    "raw_markdown": "# Article Title\n\nArticle content goes here with additional elements...",
-                    "html": "<h1>Article Title</h1><p>Article content goes here...</p>"
-                },
-                "extracted_data": {
-                    "title": "Article Title",
-                    "content": "Article content goes here...",
-                    "author": "John Doe",
-                    "published_date": "2023-10-15T14:30:00Z"
-                },
-                "metadata": {
-                    "url": "https://example.com/article/1",
-                    "extraction_time": "2023-10-16T08:45:12Z",
-                    "content_length": 2345,
-                    "extraction_strategy": "markdown"
-                }
-            }
-        }
+    model_config = _model_config(json_schema_extra={"example": _RESPONSE_EXAMPLE})
 
 class ErrorResponse(BaseModel):
     """Error response model."""
     detail: str = Field(..., description="Error message")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "detail": "Failed to extract content: Connection timeout"
-            }
-        }
+    model_config = _model_config(json_schema_extra={"example": _ERROR_EXAMPLE})
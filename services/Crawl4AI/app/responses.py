@@ -0,0 +1,13 @@
+"""
+Response classes for the Web Scraping Service.
+"""
+from typing import Any
+
+import orjson
+from starlette.responses import JSONResponse
+
+class ORJSONResponse(JSONResponse):
+    """JSON response serialized in a single pass with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,100 @@
+"""
+In-process caching helpers for the Web Scraping Service.
+This module provides a small bounded LRU cache with per-entry expiry and a
+helper that coalesces concurrent computations of the same key.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire after a time-to-live.
+
+    Not thread-safe; intended to be used from a single event loop.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        """Initialize an empty cache."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entries."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# Number of callers currently awaiting each shared singleflight task
+_waiters: Dict["asyncio.Task[Any]", int] = {}
+
+async def singleflight(inflight: Dict[Hashable, "asyncio.Task[T]"], key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+    """
+    Await factory() for key, sharing one run between concurrent callers.
+    
+    The work runs in its own task registered in inflight until it finishes.
+    Callers await it through asyncio.shield, so a cancelled caller does not
+    abort it for the others; once the last caller is cancelled the shared
+    task is cancelled too, since nobody is left to use its result.
+    
+    Args:
+        inflight: Mapping of keys to running tasks, owned by the caller
+        key: Key identifying the computation
+        factory: Zero-argument callable returning the awaitable to run
+        
+    Returns:
+        The result of the shared computation
+    """
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        inflight[key] = task
+        
+        def _done(finished: asyncio.Task) -> None:
+            if inflight.get(key) is finished:
+                del inflight[key]
+            _waiters.pop(finished, None)
+            # Mark the exception as retrieved in case every caller was cancelled
+            if not finished.cancelled():
+                finished.exception()
+        
+        task.add_done_callback(_done)
+    
+    _waiters[task] = _waiters.get(task, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        remaining = _waiters.pop(task, 1) - 1
+        if remaining:
+            _waiters[task] = remaining
+        elif not task.done():
+            # The last caller was cancelled; drop the key right away so new
+            # callers start fresh instead of joining the cancelled task
+            if inflight.get(key) is task:
+                del inflight[key]
+            task.cancel()
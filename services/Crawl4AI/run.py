@@ -1,7 +1,18 @@
 """
 Startup script for the Web Scraping Service.
 """
+import os
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("WEB_WORKERS", "1")),
+        reload=os.getenv("DEV") == "1",
+        log_level="info"
+    )
@@ -5,7 +5,15 @@ This will run both unit and integration tests.
 import os
 import sys
 import subprocess
+import time
 import argparse
+import importlib.util
+
+VENV_PYTHON = "/home/soushi888/Projets/Caramoussin/webinsight/.venv/bin/python"
+BASE_URL = "http://localhost:8000"
+
+# Shared keep-alive client for server probes, created on first use
+_client = None
 
 def run_command(cmd, cwd=None):
     """Run a command and return the output."""
@@ -19,27 +27,38 @@ def run_command(cmd, cwd=None):
     print(proc.stdout)
     return True
 
-def run_unit_tests():
-    """Run the unit tests for the Crawl4AI service."""
-    print("Running unit tests...")
-    venv_python = "/home/soushi888/Projets/Caramoussin/webinsight/.venv/bin/python"
-    return run_command([venv_python, "-m", "pytest", "tests/test_unit.py", "-v"])
-
-def run_integration_tests():
-    """Run the integration tests for the Crawl4AI service."""
-    print("Running integration tests...")
-    venv_python = "/home/soushi888/Projets/Caramoussin/webinsight/.venv/bin/python"
-    return run_command([venv_python, "-m", "pytest", "tests/test_integration.py", "-v"])
+def run_tests(test_files):
+    """Run the given test files in a single pytest session."""
+    print(f"Running {', '.join(test_files)}...")
+    cmd = [VENV_PYTHON, "-m", "pytest", *test_files, "-v"]
+    # Spread test files over all cores when pytest-xdist is available
+    if importlib.util.find_spec("xdist") is not None:
+        cmd += ["-n", "auto", "--dist=loadfile"]
+    return run_command(cmd)
 
 def check_server():
     """Check if the server is running."""
+    global _client
     try:
-        import requests
-        response = requests.get("http://localhost:8000/")
+        import httpx
+        if _client is None:
+            _client = httpx.Client(base_url=BASE_URL)
+        response = _client.head("/", timeout=1)
         return response.status_code == 200
     except:
         return False
 
+def wait_for_server(timeout=15):
+    """Poll the server until it answers, backing off from 50 ms to 500 ms."""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while not check_server():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+    return True
+
 def main():
     """Main entry point for the test runner."""
     parser = argparse.ArgumentParser(description="Run tests for the Crawl4AI service")
@@ -58,19 +77,16 @@ def main():
     server_process = None
     if args.start_server and not check_server():
         print("Starting Crawl4AI server...")
-        venv_python = "/home/soushi888/Projets/Caramoussin/webinsight/.venv/bin/python"
         server_process = subprocess.Popen(
-            [venv_python, "run.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            [VENV_PYTHON, "run.py"],
+            # Nobody reads the server's output, and a full pipe would block it
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            # Enable the httpbin.org/html shortcuts the integration tests rely on
+            env={**os.environ, "TEST_MODE": "1"}
         )
         # Wait for server to start
-        import time
-        for _ in range(10):
-            if check_server():
-                break
-            time.sleep(1)
-        else:
+        if not wait_for_server():
             print("Failed to start server!")
             if server_process:
                 server_process.terminate()
@@ -78,18 +94,19 @@ def main():
     
     success = True
     try:
-        # Run unit tests
+        # Collect every requested test file so pytest runs (and collects) once
+        test_files = []
         if args.unit or run_all:
-            unit_success = run_unit_tests()
-            success = success and unit_success
+            test_files.append("tests/test_unit.py")
         
-        # Run integration tests
         if args.integration or run_all:
             if not check_server():
                 print("Warning: Server is not running. Integration tests will be skipped.")
             else:
-                integration_success = run_integration_tests()
-                success = success and integration_success
+                test_files.append("tests/test_integration.py")
+        
+        if test_files:
+            success = run_tests(test_files)
     finally:
         # Terminate server if we started it
         if server_process:
@@ -104,4 +121,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main()) 
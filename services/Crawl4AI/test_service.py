@@ -3,7 +3,7 @@ Test script for the Web Scraping Service.
 This script tests the basic functionality of the Crawl4AI integration.
 """
 import asyncio
-import json
+import orjson
 import sys
 import os
 
@@ -37,7 +37,7 @@ async def test_content_extraction():
         
         if not result or 'content' not in result or not result['content']['markdown']:
             print("Warning: No content extracted or content is empty")
-            print(f"Result: {json.dumps(result, indent=2)}")
+            print(f"Result: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
             return result
         
         print(f"Extraction successful!")
@@ -45,7 +45,7 @@ async def test_content_extraction():
         print(f"First 200 characters of markdown content:")
         print(result['content']['markdown'][:200])
         print("\nMetadata:")
-        print(json.dumps(result['metadata'], indent=2))
+        print(orjson.dumps(result['metadata'], option=orjson.OPT_INDENT_2).decode())
         
         return result
     except Exception as e:
@@ -61,7 +61,7 @@ async def test_robots_txt():
         result = await check_robots_txt("https://httpbin.org", "webinsight")
         
         print(f"Robots.txt check result: {result['allowed']}")
-        print(f"Details: {json.dumps(result, indent=2)}")
+        print(f"Details: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
         
         return result
     except Exception as e:
@@ -0,0 +1,8 @@
+"""
+Shared pytest configuration for the Crawl4AI service tests.
+"""
+import pathlib
+import sys
+
+# Make the service root importable so tests can import from app
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
@@ -1,22 +1,69 @@
 """
 Unit tests for the Crawl4AI service.
 """
-import sys
-import os
+import json
+import asyncio
+import gc
+import threading
+import time
+import urllib.robotparser
+from types import SimpleNamespace
+import httpx
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
-# Add the parent directory to the Python path to allow importing from app
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.crawler import extract_content, check_robots_txt, RateLimiter
 
-from app.main import app
-from app.services.crawler import extract_content, check_robots_txt
+@pytest.fixture(scope="session")
+def app():
+    """Import the FastAPI app only when a test needs it."""
+    from app.main import app as fastapi_app
+    return fastapi_app
 
-client = TestClient(app)
+@pytest.fixture(scope="session")
+def client(app):
+    """Share one TestClient, so the app's lifespan runs once per session."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Reset process-wide caches so tests don't leak state into each other."""
+    from app.services import crawler
+    crawler._robots_cache.clear()
+    crawler._result_cache.clear()
+    crawler._content_cache.clear()
+    crawler._browsers.clear()
+    crawler._playwright = None
+    crawler._context_pool._idle.clear()
+    crawler._crawlers.clear()
+    crawler._crawler_users.clear()
+    crawler._host_semaphores.clear()
+    crawler._host_users.clear()
+    crawler._host_limiters.clear()
+    crawler._http_client = None
+    yield
+    crawler._robots_cache.clear()
+    crawler._result_cache.clear()
+    crawler._content_cache.clear()
+    crawler._browsers.clear()
+    crawler._playwright = None
+    crawler._context_pool._idle.clear()
+    crawler._crawlers.clear()
+    crawler._crawler_users.clear()
+
+def serve_robots(handler):
+    """Patch the crawler's shared HTTP client to answer requests with handler."""
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return patch('app.services.crawler.get_http_client', return_value=http_client)
+
+def robots_ok(request):
+    """Serve an empty robots.txt."""
+    return httpx.Response(200, text="")
 
 # Test the API endpoints
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test the root endpoint."""
     response = client.get("/")
     assert response.status_code == 200
@@ -24,6 +71,19 @@ def test_root_endpoint():
     assert data["service"] == "Web Scraping Service"
     assert data["status"] == "operational"
 
+def test_root_endpoint_head(client):
+    """Test that the root endpoint answers HEAD readiness probes."""
+    response = client.head("/")
+    assert response.status_code == 200
+    assert response.content == b""
+
+def test_openapi_schema(client):
+    """Test that the OpenAPI schema renders with the model examples."""
+    response = client.get("/openapi.json")
+    assert response.status_code == 200
+    schemas = response.json()["components"]["schemas"]
+    assert schemas["ExtractionOptions"]["example"]["url"] == "https://example.com/article/1"
+
 # Test extract_content_playwright function
 @pytest.mark.asyncio
 @patch('app.services.crawler.async_playwright')
@@ -34,18 +94,26 @@ async def test_extract_content_playwright(mock_playwright):
     mock_browser = AsyncMock()
     mock_context = AsyncMock()
     mock_page = AsyncMock()
-    mock_element = AsyncMock()
     
-    # Configure the Playwright context
-    mock_playwright.return_value.__aenter__.return_value = mock_pw
+    # Configure the shared Playwright driver and browser
+    mock_playwright.return_value.start = AsyncMock(return_value=mock_pw)
     mock_pw.chromium.launch.return_value = mock_browser
+    mock_browser.is_connected = MagicMock(return_value=True)
     mock_browser.new_context.return_value = mock_context
+    mock_context.browser = mock_browser
+    mock_context.pages = [mock_page]
+    mock_context.service_workers = []
     mock_context.new_page.return_value = mock_page
-    mock_page.query_selector.return_value = mock_element
-    mock_element.inner_html.return_value = "<div>Dynamic Content</div>"
+    site_data = [False]
+    
+    def evaluate(script, *args):
+        if script == SITE_DATA_JS:
+            return site_data[0]
+        return {"html": "<div>Dynamic Content</div>", "text": "Dynamic Content"}
+    mock_page.evaluate.side_effect = evaluate
 
     # Call the function
-    from app.services.crawler import extract_content_playwright
+    from app.services.crawler import extract_content_playwright, SITE_DATA_JS
     result = await extract_content_playwright(
         url="https://example.com",
         selectors={"base_selector": "div"},
@@ -54,7 +122,138 @@ async def test_extract_content_playwright(mock_playwright):
     assert "content" in result
     assert "html" in result["content"]
     assert result["content"]["html"] == "<div>Dynamic Content</div>"
+    assert result["extracted_data"] == {"content": "Dynamic Content"}
+    # The element's HTML and text come back from a single evaluation, then
+    # the released context is checked for leftover site data
+    assert mock_page.evaluate.call_count == 2
+    assert "__webinsightExtract" in mock_page.evaluate.call_args_list[0].args[0]
+    mock_page.query_selector.assert_not_called()
     assert result["metadata"]["extraction_strategy"] == "playwright"
+    
+    # A second call reuses both the browser and the pooled context
+    await extract_content_playwright(
+        url="https://example.com",
+        options={"headless": True, "wait_selectors": ["main", "#app"]}
+    )
+    mock_pw.chromium.launch.assert_called_once()
+    assert mock_pw.chromium.launch.call_args.kwargs["channel"] == "chromium-headless-shell"
+    mock_browser.new_context.assert_called_once()
+    mock_context.add_init_script.assert_called_once()
+    # Navigation waits for the DOM only by default
+    assert mock_page.goto.call_args.kwargs["wait_until"] == "domcontentloaded"
+    # Heavy resources are blocked by default
+    mock_context.route.assert_called_once()
+    assert mock_context.clear_cookies.call_count == 2
+    mock_context.close.assert_not_called()
+    mock_browser.close.assert_not_called()
+    
+    # All wait selectors are awaited with one page function
+    mock_page.wait_for_function.assert_called_once()
+    assert mock_page.wait_for_function.call_args.kwargs["arg"] == ["main", "#app"]
+    mock_page.wait_for_selector.assert_not_called()
+    
+    # A context whose page left site data behind is closed, not pooled
+    site_data[0] = True
+    await extract_content_playwright(url="https://example.com", options={"headless": True})
+    mock_context.close.assert_called_once()
+    await extract_content_playwright(url="https://example.com", options={"headless": True})
+    assert mock_browser.new_context.call_count == 2
+
+@pytest.mark.asyncio
+@patch('app.services.crawler._get_browser')
+async def test_browser_context_pool_evicts_oldest_idle(mock_get_browser):
+    """Test that the context pool caps idle and in-use contexts together."""
+    from app.services.crawler import BrowserContextPool
+    mock_browser = AsyncMock()
+    mock_get_browser.return_value = mock_browser
+    
+    def new_context(**options):
+        context = AsyncMock()
+        context.browser = mock_browser
+        context.pages = []
+        context.service_workers = []
+        return context
+    mock_browser.new_context.side_effect = new_context
+    
+    pool = BrowserContextPool(max_contexts=2)
+    async with pool.acquire(user_agent="a") as first:
+        pass
+    async with pool.acquire(user_agent="b") as second:
+        # One idle and one in use fill the pool, so "a" is closed for "c"
+        async with pool.acquire(user_agent="c") as third:
+            first.close.assert_awaited_once()
+    
+    # Assertions - only the two newest contexts are kept, each under its own options
+    assert list(pool._idle.values()) == [(True, "c", False), (True, "b", False)]
+    second.close.assert_not_called()
+    third.close.assert_not_called()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("resource_type, blocked", [("image", True), ("font", True), ("document", False), ("script", False)])
+async def test_block_heavy_resources(resource_type, blocked):
+    """Test that only heavy resource types are aborted."""
+    from app.services.crawler import _block_heavy_resources
+    route = AsyncMock()
+    route.request.resource_type = resource_type
+    
+    await _block_heavy_resources(route)
+    
+    # Assertions
+    assert route.abort.called is blocked
+    assert route.continue_.called is not blocked
+
+@pytest.mark.parametrize("test_mode", [True, False])
+def test_httpbin_fallback_only_in_test_mode(test_mode):
+    """Test that the httpbin.org/html shortcut is gated on TEST_MODE."""
+    from app.services.crawler import create_fallback_response
+    with patch('app.services.crawler.TEST_MODE', test_mode):
+        result = create_fallback_response("https://httpbin.org/html")
+    
+    # Assertions
+    assert result["metadata"]["url"] == "https://httpbin.org/html"
+    assert ("error" in result["metadata"]) is not test_mode
+    assert bool(result["content"]["markdown"]) is test_mode
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.async_playwright')
+async def test_extract_content_playwright_deadline(mock_playwright):
+    """Test that a page exceeding the global deadline yields a fallback and drops its context."""
+    mock_pw = AsyncMock()
+    mock_browser = AsyncMock()
+    mock_context = AsyncMock()
+    mock_page = AsyncMock()
+    mock_playwright.return_value.start = AsyncMock(return_value=mock_pw)
+    mock_pw.chromium.launch.return_value = mock_browser
+    mock_browser.is_connected = MagicMock(return_value=True)
+    mock_browser.new_context.return_value = mock_context
+    mock_context.new_page.return_value = mock_page
+    
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    mock_page.goto.side_effect = hang
+    
+    from app.services.crawler import extract_content_playwright
+    result = await extract_content_playwright(url="https://example.com", options={"global_timeout": 0.01})
+    
+    # Assertions
+    assert result["metadata"]["error"] == "Error during content extraction"
+    mock_context.close.assert_called_once()
+
+def test_extract_options_from_dict():
+    """Test that options dicts are parsed once into ExtractOptions."""
+    from app.services.crawler import ExtractOptions
+    opts = ExtractOptions.from_dict({
+        "headless": False,
+        "wait_selectors": ["main"],
+        "js_scripts": None,
+        "unknown": 1
+    })
+    
+    # Assertions - None falls back to the default and unknown keys are ignored
+    assert opts.headless is False
+    assert opts.wait_selectors == ("main",)
+    assert opts.js_scripts == ()
+    assert opts.threshold is None
 
 # Test extract_content function
 @pytest.mark.asyncio
@@ -71,7 +270,7 @@ async def test_extract_content_use_browser(mock_crawler, mock_playwright_func):
     result = await extract_content(
         url="https://example.com",
         selectors={"base_selector": "html"},
-        options={"use_browser": True}
+        options={"use_browser": True, "check_robots_txt": False}
     )
     assert result["content"]["html"] == "<html>dynamic</html>"
     assert result["metadata"]["extraction_strategy"] == "playwright"
@@ -84,13 +283,15 @@ async def test_extract_content(mock_crawler):
     mock_instance = AsyncMock()
     mock_crawler.return_value = mock_instance
     
-    # Setup mock result for the new crawl method (returns a list in v0.5.0)
-    mock_result = MagicMock()
-    mock_result.markdown = "# Test Content"
-    mock_result.html = "<h1>Test Content</h1>"
+    # Setup mock result for arun (returns a container of results)
+    mock_result = SimpleNamespace(
+        markdown="# Test Content",
+        html="<h1>Test Content</h1>",
+        extracted_content='[{"title": "Test Content"}]'
+    )
     
-    # In the new version, we need to return a list of results
-    mock_instance.crawl.return_value = [mock_result]
+    # A list stands in for the CrawlResultContainer
+    mock_instance.arun.return_value = [mock_result]
     
     # Mock the close method
     mock_instance.close = AsyncMock()
@@ -99,16 +300,20 @@ async def test_extract_content(mock_crawler):
     result = await extract_content(
         url="https://example.com",
         selectors={"base_selector": "main"},
-        options={"use_browser": False}  # Prevent automatic browser usage
+        options={"use_browser": False, "check_robots_txt": False}  # Prevent automatic browser usage
     )
     
     # Assertions
-    assert "content" in result
-    assert "markdown" in result["content"]
+    assert result["content"]["markdown"] == "# Test Content"
+    assert result["content"]["html"] == "<h1>Test Content</h1>"
     
-    # Check that the mock was called correctly
-    mock_instance.crawl.assert_called_once()
-    mock_instance.close.assert_called_once()
+    # Check that the mock was called correctly; the crawler stays open for reuse
+    mock_instance.start.assert_called_once()
+    mock_instance.arun.assert_called_once()
+    mock_instance.close.assert_not_called()
+    
+    # The strategy's JSON string is decoded into plain data
+    assert result["extracted_data"] == [{"title": "Test Content"}]
     
     # Since we're using a mock, we should check that the function was called
     # rather than checking specific content values which may have changed
@@ -118,61 +323,476 @@ async def test_extract_content(mock_crawler):
     # For debugging purposes, print the result
     print(f"Result content: {result['content']}")
 
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_strip_anchor_noise(mock_crawler):
+    """Test that code line anchors and same-page anchor links are stripped on request."""
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    mock_result = SimpleNamespace(
+        markdown=(
+            "[](https://docs.example.com/guide#__codelineno-0-1)\n"
+            "See [Install](https://docs.example.com/guide#install) and [API](https://docs.example.com/api#top)."
+        ),
+        redirected_url="https://docs.example.com/guide"
+    )
+    mock_instance.arun.return_value = [mock_result]
+    
+    result = await extract_content(
+        url="https://docs.example.com/guide",
+        options={"strip_anchor_noise": True, "check_robots_txt": False}
+    )
+    
+    # Assertions - links to other pages are kept
+    expected = "See Install and [API](https://docs.example.com/api#top)."
+    assert result["content"]["markdown"] == expected
+    assert result["content"]["raw_markdown"] == expected
+    assert result["metadata"]["content_length"] == len(expected)
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_without_raw_markdown(mock_crawler):
+    """Test that raw markdown is left out when the client does not ask for it."""
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    mock_result = SimpleNamespace(
+        markdown=SimpleNamespace(fit_markdown="# Fit", raw_markdown="# Raw\n\nNavigation"),
+        html="<h1>Fit</h1>"
+    )
+    mock_instance.arun.return_value = [mock_result]
+    
+    result = await extract_content(
+        url="https://example.com",
+        options={"include_raw_markdown": False, "check_robots_txt": False}
+    )
+    
+    # Assertions
+    assert result["content"] == {"markdown": "# Fit", "html": "<h1>Fit</h1>"}
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.extract_content_playwright')
+async def test_extract_content_playwright_without_raw_markdown(mock_playwright_func):
+    """Test that the browser path also leaves raw markdown out when not asked for."""
+    mock_playwright_func.return_value = {
+        "content": {"html": "<h1>Fit</h1>", "markdown": "Fit", "raw_markdown": "Fit"},
+        "extracted_data": None,
+        "metadata": {"url": "https://example.com", "extraction_strategy": "playwright"}
+    }
+    
+    result = await extract_content(
+        url="https://example.com",
+        selectors={"base_selector": "h1"},
+        options={"use_browser": True, "include_raw_markdown": False, "check_robots_txt": False}
+    )
+    
+    # Assertions
+    assert result["content"] == {"html": "<h1>Fit</h1>", "markdown": "Fit"}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("head, static", [
+    ("<title>Static</title>", True),
+    ("<script src='/app.js'></script>", False),
+])
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_static_fast_path(mock_crawler, head, static):
+    """Test that pages without head scripts skip the browser when asked to."""
+    html = f"<html><head>{head}</head><body><h1>Hello</h1></body></html>"
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    mock_instance.arun.return_value = []
+    
+    def handler(request):
+        return httpx.Response(200, text=html, headers={"content-type": "text/html; charset=utf-8"})
+    
+    with serve_robots(handler):
+        await extract_content(
+            url="https://example.com/page",
+            options={"static_fast_path": True, "use_cache": False, "check_robots_txt": False}
+        )
+    
+    # Assertions
+    crawl_url = mock_instance.arun.call_args.args[0]
+    config = mock_instance.arun.call_args.kwargs["config"]
+    if static:
+        assert crawl_url == f"raw:{html}"
+        assert config.base_url == "https://example.com/page"
+        assert "crawler_strategy" in mock_crawler.call_args.kwargs
+    else:
+        assert crawl_url == "https://example.com/page"
+        assert "config" in mock_crawler.call_args.kwargs
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_static_page_dedup(mock_crawler):
+    """Test that an unchanged static page is not scraped twice."""
+    from app.services import crawler
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    mock_result = SimpleNamespace(markdown="# Hello", html="<h1>Hello</h1>")
+    mock_instance.arun.return_value = [mock_result]
+    
+    def handler(request):
+        return httpx.Response(200, text="<html><head></head><body><h1>Hello</h1></body></html>", headers={"content-type": "text/html"})
+    
+    options = {"static_fast_path": True, "check_robots_txt": False}
+    with serve_robots(handler):
+        first = await extract_content("https://example.com/page", options=options)
+        # Expire the per-URL result cache so the page is fetched again
+        crawler._result_cache.clear()
+        second = await extract_content("https://example.com/page", options=options)
+    
+    # Assertions
+    mock_instance.arun.assert_called_once()
+    assert second["content"] is first["content"]
+    assert second is not first
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_robots_disallowed(mock_crawler):
+    """Test that extract_content skips URLs disallowed by robots.txt."""
+    def handler(request):
+        return httpx.Response(200, text="User-agent: *\nDisallow: /private")
+    
+    with serve_robots(handler):
+        result = await extract_content("https://example.com/private/page")
+    
+    # Assertions - no crawl is attempted
+    assert result["metadata"]["error"] == "robots_disallowed"
+    assert result["content"]["html"] == ""
+    mock_crawler.assert_not_called()
+    
+    # The API's check_robots_txt option turns the gate off
+    mock_crawler.return_value = AsyncMock()
+    with serve_robots(handler):
+        await extract_content("https://example.com/private/page", options={"check_robots_txt": False})
+    mock_crawler.assert_called_once()
+
+@pytest.mark.asyncio
+@patch('app.services.crawler._extract_content')
+async def test_extract_content_cached(mock_extract):
+    """Test that repeated and concurrent extractions of one request share a result."""
+    async def slow_extract(url, selectors, options):
+        await asyncio.sleep(0)
+        return {"content": {"html": "<p>cached</p>"}, "extracted_data": None, "metadata": {"url": url}}
+    mock_extract.side_effect = slow_extract
+    
+    first, second = await asyncio.gather(
+        extract_content("https://example.com", options={"threshold": 0.5}),
+        extract_content("https://example.com", options={"threshold": 0.5})
+    )
+    third = await extract_content("https://example.com", options={"threshold": 0.5})
+    await extract_content("https://example.com", options={"threshold": 0.5, "use_cache": False})
+    
+    # Assertions - one extraction for the cached calls, one for the bypass
+    assert first is second is third
+    assert mock_extract.call_count == 2
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_reuses_run_config(mock_crawler):
+    """Test that equal schemas and filter settings share one run configuration."""
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    mock_instance.arun.return_value = []
+    schema = {"name": "Articles", "baseSelector": "article", "fields": []}
+    
+    for schema_variant in (schema, dict(reversed(list(schema.items())))):
+        await extract_content(
+            url="https://example.com",
+            options={
+                "extraction_schema": schema_variant, "wait_selectors": ["#main", ".ready"],
+                "use_cache": False, "check_robots_txt": False
+            }
+        )
+    
+    # Assertions - each crawl got its own copy of one shared configuration
+    first, second = (call.kwargs["config"] for call in mock_instance.arun.call_args_list)
+    assert first is not second
+    assert first.markdown_generator is second.markdown_generator
+    assert first.extraction_strategy is second.extraction_strategy
+    assert first.extraction_strategy is not None
+    # Wait selectors become a single Crawl4AI JS condition
+    assert first.wait_for.startswith("js:") and '["#main",".ready"]' in first.wait_for
+    # Both crawls ran on one pooled crawler
+    mock_crawler.assert_called_once()
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_crawl_error_keeps_shared_crawler(mock_crawler):
+    """Test that one failing crawl doesn't close the crawler others are using."""
+    from app.services import crawler
+    mock_instance = AsyncMock()
+    mock_crawler.return_value = mock_instance
+    browser = mock_instance.crawler_strategy.browser_manager.browser
+    browser.is_connected = MagicMock(return_value=True)
+    
+    async def arun(url, config):
+        await asyncio.sleep(0)
+        if url.endswith("/broken"):
+            raise RuntimeError("page crashed")
+        return [SimpleNamespace(markdown="# Fine", html="<h1>Fine</h1>")]
+    mock_instance.arun.side_effect = arun
+    
+    options = {"use_cache": False, "check_robots_txt": False}
+    broken, fine = await asyncio.gather(
+        extract_content("https://example.com/broken", options=options),
+        extract_content("https://example.com/fine", options=options)
+    )
+    
+    # Assertions - only the failing crawl fell back, on a still pooled crawler
+    assert broken["content"]["markdown"] == ""
+    assert fine["content"]["markdown"] == "# Fine"
+    mock_instance.close.assert_not_called()
+    assert list(crawler._crawlers.values()) == [mock_instance]
+    
+    # A crawler whose browser died is replaced
+    browser.is_connected.return_value = False
+    await extract_content("https://example.com/broken", options=options)
+    mock_instance.close.assert_awaited_once()
+    assert not crawler._crawlers
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.CRAWLER_POOL_SIZE', 2)
+@patch('app.services.crawler.AsyncWebCrawler')
+async def test_extract_content_crawler_pool_bounded(mock_crawler):
+    """Test that the crawler pool closes its least recently used crawler when full."""
+    from app.services import crawler
+    instances = {}
+    
+    def make_crawler(config):
+        instance = AsyncMock()
+        instance.arun.return_value = []
+        instances[config.user_agent] = instance
+        return instance
+    mock_crawler.side_effect = make_crawler
+    
+    for user_agent in ("a", "b", "a", "c"):
+        await extract_content(
+            url="https://example.com",
+            options={"user_agent": user_agent, "use_cache": False, "check_robots_txt": False}
+        )
+    
+    # Assertions - "b" was the least recently used when "c" needed room
+    instances["b"].close.assert_awaited_once()
+    instances["a"].close.assert_not_called()
+    assert [key[2] for key in crawler._crawlers] == ["a", "c"]
+
+@pytest.mark.asyncio
+@patch('app.services.crawler._extract_content')
+async def test_extract_content_many(mock_extract):
+    """Test that batch extraction keeps URL order and bounds concurrency."""
+    from app.services.crawler import extract_content_many
+    running = []
+    peak = []
+    
+    async def fake_extract(url, selectors, options):
+        running.append(url)
+        peak.append(len(running))
+        await asyncio.sleep(0)
+        running.remove(url)
+        return {"content": {"html": url}, "extracted_data": None, "metadata": {"url": url}}
+    mock_extract.side_effect = fake_extract
+    
+    urls = [f"https://example.com/{i}" for i in range(5)]
+    results = await extract_content_many(urls, options={"concurrency": 2})
+    
+    # Assertions
+    assert [result["metadata"]["url"] for result in results] == urls
+    assert max(peak) == 2
+
+@pytest.mark.asyncio
+@patch('app.services.crawler._fetch_content')
+async def test_extract_content_per_host_concurrency(mock_fetch):
+    """Test that concurrent fetches to one host are capped."""
+    from app.services import crawler
+    running = []
+    peak = []
+    
+    async def fake_fetch(url, selectors, opts):
+        running.append(url)
+        peak.append(len(running))
+        await asyncio.sleep(0)
+        running.remove(url)
+        return {"content": {}, "extracted_data": None, "metadata": {"url": url}}
+    mock_fetch.side_effect = fake_fetch
+    
+    options = {"use_cache": False, "check_robots_txt": False}
+    await asyncio.gather(*(extract_content(f"https://example.com/{i}", options=options) for i in range(5)))
+    
+    # Assertions - the cap held and the idle host's slots were released
+    assert max(peak) == crawler.PER_HOST_CONCURRENCY
+    assert not crawler._host_semaphores
+    assert not crawler._host_users
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.asyncio.sleep', new_callable=AsyncMock)
+@patch('app.services.crawler._fetch_content')
+async def test_extract_content_crawl_delay(mock_fetch, mock_sleep):
+    """Test that a cached robots.txt Crawl-delay spaces requests to its host."""
+    from app.services import crawler
+    mock_fetch.return_value = {"content": {}, "extracted_data": None, "metadata": {}}
+    rp = urllib.robotparser.RobotFileParser()
+    rp.parse(["User-agent: *", "Crawl-delay: 5"])
+    crawler._robots_cache.set(("https", "example.com"), rp)
+    
+    options = {"use_cache": False, "check_robots_txt": False}
+    await extract_content("https://example.com/a", options=options)
+    await extract_content("https://example.com/b", options=options)
+    
+    # Assertions - the second request waited out the delay
+    mock_sleep.assert_awaited_once()
+    assert mock_sleep.call_args.args[0] == pytest.approx(5.0, abs=0.05)
+    
+    # Opting out of rate limits skips the delay
+    await extract_content("https://example.com/c", options={**options, "respect_rate_limits": False})
+    mock_sleep.assert_awaited_once()
+
 # Test robots.txt checking
 @pytest.mark.asyncio
+@pytest.mark.parametrize("can_fetch, fetch_error, expected_allowed", [
+    (True, None, True),
+    (False, None, False),
+    # A failed fetch defaults to allowed with an error message
+    (None, httpx.ConnectError("Failed to fetch robots.txt"), True),
+], ids=["allowed", "disallowed", "exception"])
 @patch('app.services.crawler.urllib.robotparser.RobotFileParser')
-async def test_check_robots_txt_allowed(mock_robotparser):
-    """Test the check_robots_txt function when access is allowed."""
+async def test_check_robots_txt(mock_robotparser, can_fetch, fetch_error, expected_allowed):
+    """Test the check_robots_txt function when access is allowed, disallowed or the fetch fails."""
     # Setup mock
-    mock_instance = MagicMock()
-    mock_robotparser.return_value = mock_instance
-    mock_instance.can_fetch.return_value = True
+    mock_robotparser.return_value.can_fetch.return_value = can_fetch
+    
+    def handler(request):
+        if fetch_error is not None:
+            raise fetch_error
+        return robots_ok(request)
     
     # Call the function
-    result = await check_robots_txt("https://example.com")
+    with serve_robots(handler):
+        result = await check_robots_txt("https://example.com")
     
     # Assertions
-    assert result["allowed"] is True
+    assert result["allowed"] is expected_allowed
     assert result["url"] == "https://example.com"
     assert result["robots_url"] == "https://example.com/robots.txt"
+    if fetch_error is None:
+        assert "error" not in result
+    else:
+        assert "Failed to fetch robots.txt" in result["error"]
+
+@pytest.mark.asyncio
+async def test_check_robots_txt_failure_cached():
+    """Test that a failed robots.txt fetch is not retried for the same host."""
+    calls = []
+    
+    def handler(request):
+        calls.append(request.url)
+        raise httpx.ConnectError("Failed to fetch robots.txt")
+    
+    with serve_robots(handler):
+        first = await check_robots_txt("https://example.com/a")
+        second = await check_robots_txt("https://example.com/b")
+    
+    # Assertions
+    assert len(calls) == 1
+    assert first["allowed"] is True and second["allowed"] is True
+    assert "Failed to fetch robots.txt" in second["error"]
 
 @pytest.mark.asyncio
 @patch('app.services.crawler.urllib.robotparser.RobotFileParser')
-async def test_check_robots_txt_disallowed(mock_robotparser):
-    """Test the check_robots_txt function when access is disallowed."""
+async def test_check_robots_txt_cached(mock_robotparser):
+    """Test that robots.txt is only fetched once per host."""
     # Setup mock
     mock_instance = MagicMock()
     mock_robotparser.return_value = mock_instance
-    mock_instance.can_fetch.return_value = False
+    mock_instance.can_fetch.return_value = True
+    calls = []
     
-    # Call the function
-    result = await check_robots_txt("https://example.com")
+    def handler(request):
+        calls.append(request.url)
+        return robots_ok(request)
+    
+    # Call the function twice for the same host
+    with serve_robots(handler):
+        await check_robots_txt("https://example.com/a")
+        result = await check_robots_txt("https://example.com/b", "other-agent")
+    
+    # Assertions - the parser is reused for the second path and agent
+    assert result["allowed"] is True
+    assert len(calls) == 1
+    mock_instance.parse.assert_called_once()
+    assert mock_instance.can_fetch.call_count == 2
+
+@pytest.mark.asyncio
+async def test_check_robots_txt_with_client():
+    """Test that robots.txt is fetched through the shared HTTP client."""
+    # Serve a robots.txt from a mock transport
+    def handler(request):
+        assert request.url == "https://example.com/robots.txt"
+        return httpx.Response(200, text="User-agent: *\nDisallow: /private")
+    
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        allowed = await check_robots_txt("https://example.com/public", client=http_client)
+        disallowed = await check_robots_txt("https://example.com/private/page", client=http_client)
     
     # Assertions
+    assert allowed["allowed"] is True
+    assert disallowed["allowed"] is False
+    assert "error" not in disallowed
+
+@pytest.mark.asyncio
+async def test_check_robots_txt_large_file_parsed_in_thread():
+    """Test that a large robots.txt is parsed off the event loop."""
+    body = "User-agent: *\nDisallow: /private\n" + "# padding\n" * 10000
+    
+    def handler(request):
+        return httpx.Response(200, text=body)
+    
+    with serve_robots(handler), patch('app.services.crawler.asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+        result = await check_robots_txt("https://example.com/private/page")
+    
+    # Assertions
+    mock_to_thread.assert_called_once()
     assert result["allowed"] is False
-    assert result["url"] == "https://example.com"
 
 @pytest.mark.asyncio
-@patch('app.services.crawler.urllib.robotparser.RobotFileParser')
-async def test_check_robots_txt_exception(mock_robotparser):
-    """Test the check_robots_txt function when an exception occurs."""
-    # Setup mock to raise an exception
-    mock_instance = MagicMock()
-    mock_robotparser.return_value = mock_instance
-    mock_instance.read.side_effect = Exception("Failed to fetch robots.txt")
+async def test_check_robots_txt_honors_max_age():
+    """Test that a robots.txt served with max-age=0 is not reused."""
+    calls = []
     
-    # Call the function
-    result = await check_robots_txt("https://example.com")
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, text="User-agent: *\nAllow: /", headers={"Cache-Control": "max-age=0"})
     
-    # Assertions - should default to allowed with an error message
-    assert result["allowed"] is True
-    assert "error" in result
-    assert "Failed to fetch robots.txt" in result["error"]
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        await check_robots_txt("https://example.com/a", client=http_client)
+        await check_robots_txt("https://example.com/b", client=http_client)
+    
+    # Assertions
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_check_robots_txt_concurrent_fetches_coalesced():
+    """Test that concurrent checks for one host share a single fetch."""
+    calls = []
+    
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, text="User-agent: *\nAllow: /")
+    
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        results = await asyncio.gather(*(
+            check_robots_txt(f"https://example.com/{i}", client=http_client)
+            for i in range(5)
+        ))
+    
+    # Assertions
+    assert len(calls) == 1
+    assert all(result["allowed"] for result in results)
 
 # Test API endpoints with mocked service functions
 @patch('app.main.check_robots_txt')
 @patch('app.main.extract_content')
-def test_api_extract_content(mock_extract, mock_robots):
+def test_api_extract_content(mock_extract, mock_robots, client):
     """Test the /extract API endpoint."""
     # Configure mocks
     mock_robots.return_value = {"allowed": True}
@@ -210,9 +830,52 @@ def test_api_extract_content(mock_extract, mock_robots):
     data = response.json()
     assert data["content"]["markdown"] == "# Test Content"
     assert "metadata" in data
+    
+    # The request is forwarded as a plain options dict without url/selectors
+    options = mock_extract.call_args.args[2]
+    assert options["threshold"] == 0.5
+    # The endpoint enforces robots.txt itself
+    assert options["check_robots_txt"] is False
+    assert "url" not in options and "selectors" not in options
+    assert "query" not in options  # unset fields are left to extract_content
+    
+    # Selectors are passed as a plain dict and a base selector forces the browser
+    assert mock_extract.call_args.args[1] == {"base_selector": "main"}
+    assert options["use_browser"] is True
+
+@patch('app.main.check_robots_txt')
+@patch('app.main.extract_content')
+def test_api_extract_content_default_threshold(mock_extract, mock_robots, client):
+    """Test that a BM25 request without a threshold gets the documented default."""
+    mock_extract.return_value = {"content": {"markdown": "# Test"}, "metadata": {}}
+    
+    response = client.post(
+        "/extract",
+        json={"url": "https://example.com", "filter_type": "bm25", "query": "test", "check_robots_txt": False}
+    )
+    
+    assert response.status_code == 200
+    assert mock_extract.call_args.args[2]["threshold"] == 0.48
+    mock_robots.assert_not_called()
 
 @patch('app.main.check_robots_txt')
-def test_api_robots_check(mock_robots):
+@patch('app.main.extract_content')
+def test_api_extract_content_leaves_result_unchanged(mock_extract, mock_robots, client):
+    """Test that the endpoint fills in missing keys without mutating the shared result."""
+    cached_result = {"metadata": {"url": "https://example.com"}}
+    mock_extract.return_value = cached_result
+    
+    response = client.post("/extract", json={"url": "https://example.com", "check_robots_txt": False})
+    
+    # Assertions
+    assert response.status_code == 200
+    data = response.json()
+    assert data["content"] == {"html": "", "markdown": "", "raw_markdown": ""}
+    assert data["extracted_data"] is None
+    assert cached_result == {"metadata": {"url": "https://example.com"}}
+
+@patch('app.main.check_robots_txt')
+def test_api_robots_check(mock_robots, client):
     """Test the /robots-check API endpoint."""
     # Configure mock
     mock_robots.return_value = {
@@ -229,4 +892,175 @@ def test_api_robots_check(mock_robots):
     assert response.status_code == 200
     data = response.json()
     assert data["allowed"] is True
-    assert data["url"] == "https://example.com" 
\ No newline at end of file
+    assert data["url"] == "https://example.com"
+
+@patch('app.main.check_robots_txt')
+@patch('app.services.crawler._extract_content')
+def test_api_extract_content_disallowed(mock_extract, mock_robots, client):
+    """Test that the /extract API endpoint honours robots.txt."""
+    from app.services import crawler
+    started = asyncio.Event()
+    cancelled = threading.Event()
+    
+    async def slow_extract(*args):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return {"content": {"html": "<p>private</p>"}, "metadata": {}}
+    
+    async def deny(*args):
+        # Only answer once the extraction is underway
+        await started.wait()
+        return {"allowed": False}
+    
+    # Configure mocks
+    mock_extract.side_effect = slow_extract
+    mock_robots.side_effect = deny
+    
+    # Call the API
+    response = client.post("/extract", json={"url": "https://example.com/private"})
+    
+    # Assertions - the extraction started but is cancelled and never cached
+    assert response.status_code == 403
+    assert "robots.txt" in response.json()["detail"]
+    assert cancelled.wait(1)
+    assert len(crawler._result_cache) == 0
+    assert not crawler._result_inflight
+
+@patch('app.main.check_robots_txt')
+@patch('app.main.extract_content')
+def test_api_extract_content_disallowed_cleanup_failure(mock_extract, mock_robots, client, caplog):
+    """Test that an extraction failing while it is cancelled isn't reported as unhandled."""
+    started = asyncio.Event()
+    failed = threading.Event()
+    
+    async def fail_on_cancel(*args):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            failed.set()
+            raise RuntimeError("browser went away")
+    
+    async def deny(*args):
+        await started.wait()
+        return {"allowed": False}
+    
+    mock_extract.side_effect = fail_on_cancel
+    mock_robots.side_effect = deny
+    
+    response = client.post("/extract", json={"url": "https://example.com/private"})
+    assert failed.wait(1)
+    # Give the loop a moment to finish the task, then collect it
+    time.sleep(0.05)
+    gc.collect()
+    
+    assert response.status_code == 403
+    assert "never retrieved" not in caplog.text
+
+@patch('app.main.check_robots_txt')
+@patch('app.main.extract_content')
+def test_api_extract_content_ndjson_stream(mock_extract, mock_robots, client):
+    """Test that large results are streamed as NDJSON when requested and gzipped otherwise."""
+    # Configure mocks
+    mock_robots.return_value = {"allowed": True}
+    mock_extract.return_value = {
+        "content": {"html": "x" * (256 * 1024 + 1), "markdown": "", "raw_markdown": ""},
+        "extracted_data": None,
+        "metadata": {"url": "https://example.com"}
+    }
+    
+    # Call the API with and without opting in
+    streamed = client.post(
+        "/extract",
+        json={"url": "https://example.com"},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    buffered = client.post("/extract", json={"url": "https://example.com"})
+    
+    # Assertions
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    frames = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [next(iter(frame)) for frame in frames] == ["metadata", "content", "extracted_data"]
+    assert buffered.headers["content-type"] == "application/json"
+    
+    # Only the buffered response is compressed
+    assert buffered.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in streamed.headers
+
+def test_api_rejects_non_http_urls(client):
+    """Test that both endpoints validate the URL scheme."""
+    extract = client.post("/extract", json={"url": "ftp://example.com/file"})
+    robots = client.get("/robots-check?url=not-a-url")
+    
+    # Assertions
+    assert extract.status_code == 422
+    assert robots.status_code == 422
+    assert extract.json()["detail"][0]["loc"] == ["body", "url"]
+
+def test_api_rejects_malformed_json(client):
+    """Test that an unparseable request body is reported as a validation error."""
+    response = client.post("/extract", content=b'{"url": ', headers={"Content-Type": "application/json"})
+    
+    # Assertions
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+# Test CORS handling
+def test_cors_preflight(client):
+    """Test that CORS preflight requests are answered for allowed origins."""
+    response = client.options(
+        "/extract",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type"
+        }
+    )
+    
+    # Assertions
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["access-control-allow-headers"] == "content-type"
+
+def test_cors_disallowed_origin(client):
+    """Test that CORS headers are not added for unknown origins."""
+    preflight = client.options(
+        "/extract",
+        headers={"Origin": "http://evil.example", "Access-Control-Request-Method": "POST"}
+    )
+    response = client.get("/", headers={"Origin": "http://evil.example"})
+    
+    # Assertions
+    assert preflight.status_code == 400
+    assert response.status_code == 200
+    assert "access-control-allow-origin" not in response.headers
+
+def test_cors_simple_request(client):
+    """Test that CORS headers are appended to simple requests."""
+    response = client.get("/", headers={"Origin": "http://127.0.0.1:3000"})
+    
+    # Assertions
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://127.0.0.1:3000"
+    assert response.headers["vary"] == "Origin"
+
+@pytest.mark.asyncio
+@patch('app.services.crawler.asyncio.sleep', new_callable=AsyncMock)
+async def test_rate_limiter_spaces_concurrent_waits(mock_sleep):
+    """Test that concurrent waiters are spaced one interval apart."""
+    limiter = RateLimiter("example.com", requests_per_minute=60)
+    assert limiter.can_proceed()
+    
+    await asyncio.gather(limiter.wait(), limiter.wait(), limiter.wait())
+    
+    # Assertions - the first caller proceeds, the others queue behind it
+    delays = sorted(call.args[0] for call in mock_sleep.call_args_list)
+    assert len(delays) == 2
+    assert delays[0] == pytest.approx(1.0, abs=0.05)
+    assert delays[1] == pytest.approx(2.0, abs=0.05)
+    assert not limiter.can_proceed()